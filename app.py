@@ -1,22 +1,104 @@
 # redeploy trigger
 from flask import Flask, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from flask.helpers import get_debug_flag
+from werkzeug.serving import is_running_from_reloader
 from datetime import datetime, timedelta
 import json
 from pathlib import Path
-from urllib.request import urlopen
-from urllib.error import URLError
 from weather import get_weather_forecast
 from auth import auth_bp
+from supabase_rest import (
+    SUPABASE_URL,
+    SUPABASE_KEY,
+    sb_get,
+    sb_post,
+    sb_patch,
+    sb_delete,
+)
+import sys
+import socket
 import threading
+import asyncio
 import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_left, bisect_right
+import heapq
+from operator import itemgetter
+from functools import lru_cache
 import firebase_admin
 from firebase_admin import credentials, messaging
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from zoneinfo import ZoneInfo
+import tempfile
+import hashlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+
+# ---------- JSON (orjson when installed, stdlib json otherwise) ----------
+
+
+def _json_loads(data):
+    """Parse JSON from str or bytes."""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def _json_dumps(obj):
+    """Serialize to UTF-8 JSON bytes."""
+    return orjson.dumps(obj) if orjson else json.dumps(obj).encode("utf-8")
+
+
+class OrjsonJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson. Keeps jsonify's sorted keys and
+    falls back to DefaultJSONProvider's handling for other types.
+    """
+
+    _OPTIONS = (
+        orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        if orjson
+        else 0
+    )
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def dumps_bytes(self, obj):
+        """
+        Compact response body for obj. Equivalent JSON to the stdlib
+        provider's, not byte-identical: orjson writes non-ASCII as raw UTF-8
+        rather than \\u escapes, and datetimes as ISO 8601 rather than HTTP
+        dates.
+        """
+        if orjson is None:
+            return f"{self.dumps(obj, separators=(',', ':'))}\n".encode()
+        return orjson.dumps(obj, default=self.default, option=self._OPTIONS)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self._app.debug:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+
 
 app = Flask(__name__)
+app.json = OrjsonJSONProvider(app)
 print("✅ DEPLOY CHECK: observe-pro-backend build 2026-03-02-1602Z")
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "data"
@@ -28,10 +110,12 @@ import json
 try:
     import firebase_admin
     from firebase_admin import credentials, messaging
+    from firebase_admin import exceptions as fb_exceptions
 except ImportError:
     firebase_admin = None
     credentials = None
     messaging = None
+    fb_exceptions = None
     print("⚠️ firebase-admin not installed. Push notifications disabled.")
 
 firebase_key_json = os.environ.get("FIREBASE_CREDENTIALS")
@@ -70,6 +154,52 @@ NOAA_KP_FORECAST_URL = (
     "https://services.swpc.noaa.gov/products/noaa-planetary-k-index-forecast.json"
 )
 AURORA_CACHE_TTL_SECONDS = 60 * 60  # 1 hour
+# Refresh a little before expiry so requests never find the payload stale
+AURORA_REFRESH_INTERVAL_SECONDS = 55 * 60
+
+# Kept-alive sessions for NOAA so hourly refreshes skip the TLS handshake.
+# Only the background refresher retries; a request that finds the payload
+# stale makes one short attempt and otherwise falls back to the cached copy,
+# so a NOAA outage cannot hold a gunicorn thread past its timeout.
+NOAA_SESSION = requests.Session()
+NOAA_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False,
+        ),
+    ),
+)
+NOAA_TIMEOUT = 10
+
+NOAA_REQUEST_SESSION = requests.Session()
+NOAA_REQUEST_SESSION.mount("https://", HTTPAdapter(max_retries=0))
+NOAA_REQUEST_TIMEOUT = (3.05, 5)  # (connect, read)
+
+
+FCM_MULTICAST_LIMIT = 500  # max tokens per send_each_for_multicast call
+FCM_MAX_RETRIES = 3
+TOKEN_DELETES_PER_REQUEST = 20  # bad tokens per push_tokens DELETE
+
+# Fire-and-forget pushes from request handlers, so a slow FCM round-trip
+# never holds up the HTTP response.
+PUSH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="push")
+
+
+def _log_push_error(fut):
+    exc = fut.exception()
+    if exc is not None:
+        print("Push dispatch error:", exc)
+
+
+def send_push_async(user_id, title, body, data=None):
+    """Queue send_push on PUSH_POOL and return immediately."""
+    PUSH_POOL.submit(send_push, user_id, title, body, data).add_done_callback(
+        _log_push_error
+    )
 
 
 def send_push(user_id, title, body, data=None):
@@ -78,84 +208,118 @@ def send_push(user_id, title, body, data=None):
         return
 
     rows = sb_get("push_tokens", {"user_id": f"eq.{user_id}"})
-    tokens = [row["token"] for row in rows]
+    _send_push_to_tokens([row["token"] for row in rows], title, body, data)
+
+
+def _user_push_tokens(user):
+    """Tokens embedded on a user row via select=...,push_tokens(token)."""
+    return [row["token"] for row in user.get("push_tokens") or []]
+
+
+def _send_push_to_tokens(tokens, title, body, data=None):
+    """send_push for callers that already fetched the user's tokens."""
+    if not messaging:
+        print("Push skipped - Firebase not configured")
+        return
 
     if not tokens:
         return
 
-    for token in tokens:
-        try:
-            message = messaging.Message(
-                notification=messaging.Notification(title=title, body=body),
-                data={k: str(v) for k, v in (data or {}).items()},
-                android=messaging.AndroidConfig(
-                    priority="high",
-                ),
-                token=token,
-            )
-            messaging.send(message)
+    notification = messaging.Notification(title=title, body=body)
+    payload = {k: str(v) for k, v in (data or {}).items()}
+    android = messaging.AndroidConfig(priority="high")
+
+    bad_tokens = []
+
+    for i in range(0, len(tokens), FCM_MULTICAST_LIMIT):
+        pending = tokens[i : i + FCM_MULTICAST_LIMIT]
+
+        for attempt in range(FCM_MAX_RETRIES + 1):
+            try:
+                batch = messaging.send_each_for_multicast(
+                    messaging.MulticastMessage(
+                        notification=notification,
+                        data=payload,
+                        android=android,
+                        tokens=pending,
+                    )
+                )
+            except Exception as e:
+                print("FCM send error (kept tokens):", e)
+                break
 
-        except messaging.UnregisteredError:
-            print("Removing unregistered token:", token)
-            sb_delete("push_tokens", {"token": f"eq.{token}"})
+            throttled = []
+            for token, resp in zip(pending, batch.responses):
+                exc = resp.exception
+                if exc is None:
+                    continue
+                if isinstance(exc, messaging.UnregisteredError):
+                    print("Removing unregistered token:", token)
+                    bad_tokens.append(token)
+                elif isinstance(exc, fb_exceptions.InvalidArgumentError):
+                    print("Removing invalid token:", token)
+                    bad_tokens.append(token)
+                elif isinstance(exc, messaging.QuotaExceededError):
+                    throttled.append(token)
+                else:
+                    print("FCM send error (kept token):", exc)
 
-        except messaging.InvalidArgumentError:
-            print("Removing invalid token:", token)
-            sb_delete("push_tokens", {"token": f"eq.{token}"})
+            if not throttled or attempt == FCM_MAX_RETRIES:
+                break
 
+            # FCM 429: back off exponentially with jitter, retry throttled only
+            pending = throttled
+            time.sleep((2**attempt) + random.random())
+
+    # FCM tokens are ~160 chars each, so keep every token=in.(...) URL short;
+    # cleanup failures must not fail a send that already went out
+    for chunk in _slices(bad_tokens, TOKEN_DELETES_PER_REQUEST):
+        try:
+            sb_delete("push_tokens", {"token": _in_filter(chunk)})
         except Exception as e:
-            print("FCM send error (kept token):", e)
+            print(f"push_tokens cleanup error ({len(chunk)} tokens):", e)
 
 
 # ---------- Supabase REST Setup ----------
-SUPABASE_URL = (os.environ.get("SUPABASE_URL") or "").strip().rstrip("/")
-SUPABASE_KEY = (os.environ.get("SUPABASE_KEY") or "").strip()
-
 if not SUPABASE_URL or not SUPABASE_KEY:
     raise RuntimeError("SUPABASE_URL or SUPABASE_KEY missing")
 
-HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation",
-}
-
 
-def sb_get(table, params=None):
-    r = requests.get(
-        f"{SUPABASE_URL}/rest/v1/{table}", headers=HEADERS, params=params, timeout=10
+def _in_filter(values):
+    """
+    PostgREST `in.(...)` filter; values are double-quoted so `:`/`,` are
+    safe, with backslashes escaped before quotes so neither can end a value.
+    """
+    quoted = ",".join(
+        '"{}"'.format(str(v).replace("\\", "\\\\").replace('"', '\\"')) for v in values
     )
-    r.raise_for_status()
-    return r.json()
+    return f"in.({quoted})"
 
 
-def sb_post(table, data):
-    r = requests.post(
-        f"{SUPABASE_URL}/rest/v1/{table}", headers=HEADERS, json=data, timeout=10
-    )
-    r.raise_for_status()
-    return r.json()
+def _slices(values, size):
+    """Consecutive size-long slices of values, to keep in.() URLs bounded."""
+    return [values[i : i + size] for i in range(0, len(values), size)]
 
 
-def sb_patch(table, filters, data):
-    r = requests.patch(
-        f"{SUPABASE_URL}/rest/v1/{table}",
-        headers=HEADERS,
-        params=filters,
-        json=data,
-        timeout=10,
-    )
-    r.raise_for_status()
-    return r.json()
+@lru_cache(maxsize=4096)
+def _parse_iso(dt):
+    """
+    ISO-8601 string -> datetime, trailing "Z" dropped (naive UTC).
+    Memoized: event and job timestamps repeat across rows and requests.
+    """
+    return datetime.fromisoformat(dt[:-1] if dt.endswith("Z") else dt)
 
 
-def sb_delete(table, filters):
-    r = requests.delete(
-        f"{SUPABASE_URL}/rest/v1/{table}", headers=HEADERS, params=filters, timeout=10
-    )
-    r.raise_for_status()
-    return r.json()
+UTC = ZoneInfo("UTC")
+
+
+@lru_cache(maxsize=None)
+def _zone(tz_name):
+    """Cached ZoneInfo lookup; missing/unknown names fall back to UTC."""
+    try:
+        return ZoneInfo(tz_name or "UTC")
+    except Exception:
+        return UTC
 
 
 def _recently_notified(user, hours=12):
@@ -164,30 +328,31 @@ def _recently_notified(user, hours=12):
         return False
 
     try:
-        last = datetime.fromisoformat(str(ts).replace("Z", ""))
+        last = _parse_iso(str(ts))
         return datetime.utcnow() - last < timedelta(hours=hours)
     except Exception:
         return False
 
 
+@lru_cache(maxsize=4096)
+def _parse_utc(s):
+    """ISO string -> tz-aware UTC datetime (naive input assumed UTC)."""
+    dt = _parse_iso(s)
+
+    # Ensure tz-aware (assume UTC if missing)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=UTC)
+    return dt.astimezone(UTC)
+
+
 def _parse_event_start(event):
     try:
         s = str(event.get("start") or "").strip()
         if not s:
             return None
 
-        # Make Z explicit UTC offset so fromisoformat parses it
-        s = s.replace("Z", "+00:00")
-
-        dt = datetime.fromisoformat(s)
-
-        # Ensure tz-aware (assume UTC if missing)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=ZoneInfo("UTC"))
-        else:
-            dt = dt.astimezone(ZoneInfo("UTC"))
-
-        return dt
+        # Rows are refetched every tick, but their start strings repeat
+        return _parse_utc(s)
     except Exception:
         return None
 
@@ -211,357 +376,516 @@ def _should_notify(event, now):
     return False
 
 
-def aurora_notification_job():
-    while True:
+# Per-row notification work is I/O bound (Supabase + FCM), so each job
+# tick fans its rows out over a bounded pool sharing SB_SESSION.
+NOTIFY_MAX_WORKERS = 20
+NOTIFY_POOL = ThreadPoolExecutor(
+    max_workers=NOTIFY_MAX_WORKERS, thread_name_prefix="notify"
+)
+
+# Reminder offsets in seconds; thresholds are compared as epoch timestamps
+H1 = 60 * 60
+H4 = 4 * H1
+H24 = 24 * H1
+
+
+def _run_notify_tasks(fn, rows):
+    """
+    Run fn(row, now, now_iso) for every row on NOTIFY_POOL, with one
+    tz-aware UTC `now` shared by the whole tick. Each task returns the
+    user_events fields to update (or None); they are written back in one
+    pass at the end of the tick.
+    """
+    now = datetime.now(UTC)
+    now_iso = now.replace(tzinfo=None).isoformat() + "Z"
+
+    futures = [(row, NOTIFY_POOL.submit(fn, row, now, now_iso)) for row in rows]
+
+    patches = {}
+    for row, fut in futures:
         try:
-            # Get aurora-live saved rows + user location/timezone
-            rows = sb_get(
-                "user_events",
-                {
-                    "type": "eq.aurora",
-                    "event_id": "eq.aurora-live",
-                    "select": "id,user_id,start,reminders_enabled,notified_4h_at,notified_1h_at,users(id,lat,lon,timezone)",
-                },
-            )
+            patch = fut.result()
+        except Exception as e:
+            print(f"Notify task error (row {row.get('id')}):", e)
+            continue
+        if patch:
+            patches[row["id"]] = patch
 
-            for row in rows:
-                user = row.get("users") or {}
+    _flush_user_event_patches(patches)
 
-                user_id = row.get("user_id")
-                if not user_id:
-                    continue
 
-                # Respect per-event reminders toggle
-                if row.get("reminders_enabled") is not True:
-                    continue
+# Row ids per bulk PATCH; keeps the id=in.(...) filter well under URL limits
+PATCH_IDS_PER_REQUEST = 100
 
-                lat = user.get("lat")
-                lon = user.get("lon")
-                if lat is None or lon is None:
-                    continue
 
-                tz_name = user.get("timezone") or "UTC"
-                try:
-                    user_tz = ZoneInfo(tz_name)
-                except Exception:
-                    user_tz = ZoneInfo("UTC")
+def _flush_user_event_patches(patches):
+    # Rows notified in the same tick share now_iso, so grouping by the
+    # patch body turns N per-row PATCHes into one per distinct field set.
+    groups = {}
+    for row_id, patch in patches.items():
+        groups.setdefault(tuple(sorted(patch.items())), []).append(row_id)
 
-                # Compute latest forecast for user's coords
-                forecast = get_aurora_forecast(lat, lon)
+    # Ids go in the query string, so each PATCH carries a bounded slice and
+    # an error only leaves that slice's rows unsaved
+    for fields, ids in groups.items():
+        for chunk in _slices(ids, PATCH_IDS_PER_REQUEST):
+            try:
+                sb_patch("user_events", {"id": _in_filter(chunk)}, dict(fields))
+            except Exception as e:
+                print(f"user_events bulk patch error ({len(chunk)} rows):", e)
 
-                # If not likely right now, do nothing (prevents false pushes)
-                if not forecast.get("likely"):
-                    continue
 
-                peak = forecast.get("peak") or {}
-                peak_time_tag = peak.get("time_tag")  # "YYYY-MM-DD HH:MM:SSZ"
-                if not peak_time_tag:
-                    continue
+def _process_aurora_row(row, now, now_iso):
+    patch = {}
+    user = row.get("users") or {}
 
-                # Parse peak time as UTC -> local
-                try:
-                    peak_utc = datetime.strptime(
-                        peak_time_tag.replace("Z", ""), "%Y-%m-%d %H:%M:%S"
-                    )
-                    peak_utc = peak_utc.replace(tzinfo=ZoneInfo("UTC"))
-                except Exception:
-                    continue
+    user_id = row.get("user_id")
+    if not user_id:
+        return
 
-                peak_local = peak_utc.astimezone(user_tz)
-                now_local = datetime.now(user_tz)
-
-                # Store the current peak in the row.start as ISO (UTC)
-                new_start = peak_utc.isoformat().replace("+00:00", "Z")
-                old_start = row.get("start")
-
-                # If peak changed (or start missing), update start and reset aurora push timestamps
-                if not old_start or str(old_start) != new_start:
-                    sb_patch(
-                        "user_events",
-                        {"id": f"eq.{row['id']}"},
-                        {
-                            "start": new_start,
-                            "notified_4h_at": None,
-                            "notified_1h_at": None,
-                        },
-                    )
-                    # Use updated "row" values for this tick
-                    row["start"] = new_start
-                    row["notified_4h_at"] = None
-                    row["notified_1h_at"] = None
+    # Respect per-event reminders toggle
+    if row.get("reminders_enabled") is not True:
+        return
 
-                four_h_before = peak_local - timedelta(hours=4)
-                one_h_before = peak_local - timedelta(hours=1)
+    lat = user.get("lat")
+    lon = user.get("lon")
+    if lat is None or lon is None:
+        return
 
-                # Do not send stale pushes after the peak has already passed
-                if now_local >= peak_local:
-                    continue
+    user_tz = _zone(user.get("timezone"))
+    tokens = _user_push_tokens(user)
 
-                # --- 4 hours before peak ---
-                # Send only during the 4h -> 1h window
-                if (
-                    row.get("notified_4h_at") is None
-                    and four_h_before <= now_local < one_h_before
-                ):
-                    send_push(
-                        user_id,
-                        "🌌 Aurora incoming",
-                        f"High aurora chance in ~4 hours (peak ~{peak_local.strftime('%H:%M')}).",
-                        {
-                            "type": "aurora",
-                            "target": "my-sky",
-                            "eventId": "aurora-live",
-                        },
-                    )
-                    sb_patch(
-                        "user_events",
-                        {"id": f"eq.{row['id']}"},
-                        {"notified_4h_at": _utc_now_iso()},
-                    )
+    # Compute latest forecast for user's coords
+    forecast = get_aurora_forecast(lat, lon)
 
-                # --- 1 hour before peak ---
-                # Send only during the 1h -> peak window
-                elif (
-                    row.get("notified_1h_at") is None
-                    and one_h_before <= now_local < peak_local
-                ):
-                    send_push(
-                        user_id,
-                        "🌌 Aurora soon",
-                        f"Aurora peak in ~1 hour (around {peak_local.strftime('%H:%M')}).",
-                        {
-                            "type": "aurora",
-                            "target": "my-sky",
-                            "eventId": "aurora-live",
-                        },
-                    )
-                    sb_patch(
-                        "user_events",
-                        {"id": f"eq.{row['id']}"},
-                        {"notified_1h_at": _utc_now_iso()},
-                    )
+    # If not likely right now, do nothing (prevents false pushes)
+    if not forecast.get("likely"):
+        return
 
-        except Exception as e:
-            print("Aurora job error:", e)
+    peak = forecast.get("peak") or {}
+    peak_time_tag = peak.get("time_tag")  # "YYYY-MM-DD HH:MM:SSZ"
+    if not peak_time_tag:
+        return
+
+    # Parse peak time as UTC -> local
+    try:
+        peak_utc = _parse_iso(peak_time_tag).replace(tzinfo=UTC)
+    except Exception:
+        return
 
-        time.sleep(5 * 60)  # every 5 minutes
+    peak_local = peak_utc.astimezone(user_tz)
 
+    # Store the current peak in the row.start as ISO (UTC)
+    new_start = peak_utc.isoformat().replace("+00:00", "Z")
+    old_start = row.get("start")
+
+    # If peak changed (or start missing), update start and reset aurora push timestamps
+    if not old_start or str(old_start) != new_start:
+        patch.update(
+            {
+                "start": new_start,
+                "notified_4h_at": None,
+                "notified_1h_at": None,
+            }
+        )
+        # Use updated "row" values for this tick
+        row["start"] = new_start
+        row["notified_4h_at"] = None
+        row["notified_1h_at"] = None
+
+    now_s = now.timestamp()
+    peak_s = peak_utc.timestamp()
+
+    # Do not send stale pushes after the peak has already passed
+    if now_s >= peak_s:
+        return patch
+
+    # --- 4 hours before peak ---
+    # Send only during the 4h -> 1h window
+    if row.get("notified_4h_at") is None and peak_s - H4 <= now_s < peak_s - H1:
+        _send_push_to_tokens(
+            tokens,
+            "🌌 Aurora incoming",
+            f"High aurora chance in ~4 hours (peak ~{peak_local.strftime('%H:%M')}).",
+            {
+                "type": "aurora",
+                "target": "my-sky",
+                "eventId": "aurora-live",
+            },
+        )
+        patch["notified_4h_at"] = now_iso
+
+    # --- 1 hour before peak ---
+    # Send only during the 1h -> peak window
+    elif row.get("notified_1h_at") is None and peak_s - H1 <= now_s < peak_s:
+        _send_push_to_tokens(
+            tokens,
+            "🌌 Aurora soon",
+            f"Aurora peak in ~1 hour (around {peak_local.strftime('%H:%M')}).",
+            {
+                "type": "aurora",
+                "target": "my-sky",
+                "eventId": "aurora-live",
+            },
+        )
+        patch["notified_1h_at"] = now_iso
+
+    return patch
+
+
+def aurora_notification_job():
+    """One pass of the aurora push job."""
+    try:
+        # Get aurora-live saved rows + user location/timezone
+        rows = sb_get(
+            "user_events",
+            {
+                "type": "eq.aurora",
+                "event_id": "eq.aurora-live",
+                "select": "id,user_id,start,reminders_enabled,notified_4h_at,notified_1h_at,users(id,lat,lon,timezone,push_tokens(token))",
+            },
+        )
+
+        _run_notify_tasks(_process_aurora_row, rows)
+
+    except Exception as e:
+        print("Aurora job error:", e)
+
+
+def _process_scheduled_event(event, now, now_iso):
+    patch = {}
+    user_id = event.get("user_id")
+    if not user_id:
+        return
+
+    # Owning user comes embedded with the event (see the job's select)
+    user = event.get("users")
+    if not user:
+        return
+
+    user_tz = _zone(user.get("timezone"))
+    tokens = _user_push_tokens(user)
+
+    now_local = now.astimezone(user_tz)
+
+    start_utc = _parse_event_start(event)
+    if not start_utc:
+        return
+
+    if start_utc.tzinfo is None:
+        start_utc = start_utc.replace(tzinfo=UTC)
+    else:
+        start_utc = start_utc.astimezone(UTC)
+
+    start_local = start_utc.astimezone(user_tz)
+    now_s = now.timestamp()
+    start_s = start_utc.timestamp()
+
+    print("🔁 EVENT:", event.get("title"))
+    print("🕒 now_local:", now_local)
+    print("🕒 start_local:", start_local)
+    print("⏰ 1h trigger at:", start_local - timedelta(hours=1))
+    print("⏰ 24h trigger at:", start_local - timedelta(hours=24))
+
+    event_type = event.get("type")
+
+    # 🔥 IMPORTANT:
+    # Aurora-live is handled by aurora_notification_job() only.
+    # Skip any aurora rows here to avoid duplicates.
+    if event_type == "aurora":
+        return
+
+    # =========================
+    # 🌠 METEOR
+    # =========================
+    elif event_type == "meteor":
+        # 24h reminder
+        if event.get("notified_24h_at") is None and now_s >= start_s - H24:
+            _send_push_to_tokens(
+                tokens,
+                f"🌠 {event.get('title')}",
+                "Meteor shower peak in ~24 hours.",
+                {
+                    "type": "meteor",
+                    "target": "my-sky",
+                    "eventId": event.get("event_id", ""),
+                },
+            )
+            patch["notified_24h_at"] = now_iso
+
+        # 1h reminder
+        if event.get("notified_1h_at") is None and now_s >= start_s - H1:
+            _send_push_to_tokens(
+                tokens,
+                f"🌠 {event.get('title')}",
+                "Meteor shower peak in ~1 hour.",
+                {
+                    "type": "meteor",
+                    "target": "my-sky",
+                    "eventId": event.get("event_id", ""),
+                },
+            )
+            patch["notified_1h_at"] = now_iso
+
+    # =========================
+    # 🌑 ECLIPSE / ☄ COMET / ✨ ALIGNMENT
+    # =========================
+    elif event_type in ("eclipse", "comet", "alignment"):
+        if event.get("notified_24h_at") is None and now_s >= start_s - H24:
+            _send_push_to_tokens(
+                tokens,
+                f"🌌 {event.get('title')}",
+                "Event begins in ~24 hours.",
+                {
+                    "type": event_type,
+                    "target": "my-sky",
+                    "eventId": event.get("event_id", ""),
+                },
+            )
+            patch["notified_24h_at"] = now_iso
+
+        if event.get("notified_1h_at") is None and now_s >= start_s - H1:
+            _send_push_to_tokens(
+                tokens,
+                f"🌌 {event.get('title')}",
+                "Event begins in ~1 hour.",
+                {
+                    "type": event_type,
+                    "target": "my-sky",
+                    "eventId": event.get("event_id", ""),
+                },
+            )
+            patch["notified_1h_at"] = now_iso
+
+    # =========================
+    # 🌙 MOON (day-based dataset → fixed local time)
+    # Uses calendar date from event_id moon-YYYY-MM-DD to avoid UTC day shift.
+    # =========================
+    elif event_type == "moon":
+        event_key = event.get("event_id") or event.get("eventId") or ""
+        date_str = ""
+
+        if isinstance(event_key, str) and event_key.startswith("moon-"):
+            date_str = event_key.replace("moon-", "").strip()
+
+        if not date_str:
+            start_raw = str(event.get("start") or "")
+            date_str = start_raw[:10] if len(start_raw) >= 10 else ""
+
+        if not date_str:
+            return
 
-def scheduled_event_notification_job():
-    while True:
         try:
-            events = sb_get(
-                "user_events",
+            y, m, d = map(int, date_str.split("-"))
+        except Exception:
+            return
+
+        notify_s = datetime(y, m, d, 20, 0, 0, tzinfo=user_tz).timestamp()
+
+        if event.get("notified_1h_at") is None and now_s >= notify_s:
+            _send_push_to_tokens(
+                tokens,
+                f"🌙 {event.get('title')}",
+                "Tonight’s moon phase — tap to view in My Sky.",
                 {
-                    "reminders_enabled": "eq.true",
-                    "start": f"gte.{(datetime.utcnow() - timedelta(hours=2)).isoformat()}Z",
+                    "type": "moon",
+                    "target": "my-sky",
+                    "eventId": event.get("event_id", ""),
                 },
             )
+            patch["notified_1h_at"] = now_iso
 
-            for event in events:
+    return patch
 
-                user_id = event.get("user_id")
-                if not user_id:
-                    continue
 
-                users = sb_get("users", {"id": f"eq.{user_id}", "limit": 1})
+def scheduled_event_notification_job():
+    """One pass of the scheduled-event push job."""
+    try:
+        now = datetime.utcnow()
+        oldest = f"{(now - timedelta(hours=2)).isoformat()}Z"
+        # Nothing is due before its 24h reminder window opens (moon
+        # pushes fire at 20:00 local on the event date, after start).
+        newest = f"{(now + timedelta(hours=24)).isoformat()}Z"
 
-                if not users:
-                    continue
+        events = sb_get(
+            "user_events",
+            {
+                "reminders_enabled": "eq.true",
+                "and": f'(start.gte."{oldest}",start.lte."{newest}")',
+                # Aurora rows belong to aurora_notification_job
+                "type": "neq.aurora",
+                # Rows with every reminder already sent have nothing to do
+                "or": "(notified_24h_at.is.null,notified_1h_at.is.null)",
+                # Embed the owner and their push tokens so rows need no
+                # per-event users or push_tokens lookups
+                "select": "*,users(id,timezone,push_tokens(token))",
+            },
+        )
 
-                user = users[0]
-                timezone_str = user.get("timezone") or "UTC"
+        _run_notify_tasks(_process_scheduled_event, events)
 
-                try:
-                    user_tz = ZoneInfo(timezone_str)
-                except Exception:
-                    user_tz = ZoneInfo("UTC")
+    except Exception as e:
+        print("Scheduled job error:", e)
+        print("🔥 SCHEDULER TICK", datetime.utcnow())
 
-                now_local = datetime.now(user_tz)
 
-                start_utc = _parse_event_start(event)
-                if not start_utc:
-                    continue
+AURORA_JOB_INTERVAL_SECONDS = 5 * 60
+SCHEDULED_JOB_INTERVAL_SECONDS = 60
 
-                if start_utc.tzinfo is None:
-                    start_utc = start_utc.replace(tzinfo=ZoneInfo("UTC"))
-                else:
-                    start_utc = start_utc.astimezone(ZoneInfo("UTC"))
 
-                start_local = start_utc.astimezone(user_tz)
+# Wake-ups coalesce for this long, so a burst of saves triggers one extra pass
+JOB_WAKE_DEBOUNCE_SECONDS = 2
 
-                print("🔁 EVENT:", event.get("title"))
-                print("🕒 now_local:", now_local)
-                print("🕒 start_local:", start_local)
-                print("⏰ 1h trigger at:", start_local - timedelta(hours=1))
-                print("⏰ 24h trigger at:", start_local - timedelta(hours=24))
+# Set by _notification_jobs once its loop is running (jobs worker only)
+_JOBS_LOOP = None
+_JOB_WAKEUPS = []
+_JOBS_WAKE_SOCKET = None
 
-                event_type = event.get("type")
 
-                # 🔥 IMPORTANT:
-                # Aurora-live is handled by aurora_notification_job() only.
-                # Skip any aurora rows here to avoid duplicates.
-                if event_type == "aurora":
-                    continue
+def _wake_jobs_in_loop():
+    for wake in _JOB_WAKEUPS:
+        wake.set()
 
-                # =========================
-                # 🌠 METEOR
-                # =========================
-                elif event_type == "meteor":
-                    # 24h reminder
-                    if event.get("notified_24h_at") is None and now_local >= (
-                        start_local - timedelta(hours=24)
-                    ):
-                        send_push(
-                            user_id,
-                            f"🌠 {event.get('title')}",
-                            "Meteor shower peak in ~24 hours.",
-                            {
-                                "type": "meteor",
-                                "target": "my-sky",
-                                "eventId": event.get("event_id", ""),
-                            },
-                        )
-                        sb_patch(
-                            "user_events",
-                            {"id": f"eq.{event['id']}"},
-                            {"notified_24h_at": _utc_now_iso()},
-                        )
-
-                    # 1h reminder
-                    if event.get("notified_1h_at") is None and now_local >= (
-                        start_local - timedelta(hours=1)
-                    ):
-                        send_push(
-                            user_id,
-                            f"🌠 {event.get('title')}",
-                            "Meteor shower peak in ~1 hour.",
-                            {
-                                "type": "meteor",
-                                "target": "my-sky",
-                                "eventId": event.get("event_id", ""),
-                            },
-                        )
-                        sb_patch(
-                            "user_events",
-                            {"id": f"eq.{event['id']}"},
-                            {"notified_1h_at": _utc_now_iso()},
-                        )
-
-                # =========================
-                # 🌑 ECLIPSE / ☄ COMET / ✨ ALIGNMENT
-                # =========================
-                elif event_type in ("eclipse", "comet", "alignment"):
-                    if event.get("notified_24h_at") is None and now_local >= (
-                        start_local - timedelta(hours=24)
-                    ):
-                        send_push(
-                            user_id,
-                            f"🌌 {event.get('title')}",
-                            "Event begins in ~24 hours.",
-                            {
-                                "type": event_type,
-                                "target": "my-sky",
-                                "eventId": event.get("event_id", ""),
-                            },
-                        )
-                        sb_patch(
-                            "user_events",
-                            {"id": f"eq.{event['id']}"},
-                            {"notified_24h_at": _utc_now_iso()},
-                        )
-
-                    if event.get("notified_1h_at") is None and now_local >= (
-                        start_local - timedelta(hours=1)
-                    ):
-                        send_push(
-                            user_id,
-                            f"🌌 {event.get('title')}",
-                            "Event begins in ~1 hour.",
-                            {
-                                "type": event_type,
-                                "target": "my-sky",
-                                "eventId": event.get("event_id", ""),
-                            },
-                        )
-                        sb_patch(
-                            "user_events",
-                            {"id": f"eq.{event['id']}"},
-                            {"notified_1h_at": _utc_now_iso()},
-                        )
-
-                # =========================
-                # 🌙 MOON (day-based dataset → fixed local time)
-                # Uses calendar date from event_id moon-YYYY-MM-DD to avoid UTC day shift.
-                # =========================
-                elif event_type == "moon":
-                    event_key = event.get("event_id") or event.get("eventId") or ""
-                    date_str = ""
-
-                    if isinstance(event_key, str) and event_key.startswith("moon-"):
-                        date_str = event_key.replace("moon-", "").strip()
-
-                    if not date_str:
-                        start_raw = str(event.get("start") or "")
-                        date_str = start_raw[:10] if len(start_raw) >= 10 else ""
-
-                    if not date_str:
-                        continue
-
-                    try:
-                        y, m, d = map(int, date_str.split("-"))
-                    except Exception:
-                        continue
-
-                    notify_local = datetime(y, m, d, 20, 0, 0, tzinfo=user_tz)
-
-                    if (
-                        event.get("notified_1h_at") is None
-                        and now_local >= notify_local
-                    ):
-                        send_push(
-                            user_id,
-                            f"🌙 {event.get('title')}",
-                            "Tonight’s moon phase — tap to view in My Sky.",
-                            {
-                                "type": "moon",
-                                "target": "my-sky",
-                                "eventId": event.get("event_id", ""),
-                            },
-                        )
-                        sb_patch(
-                            "user_events",
-                            {"id": f"eq.{event['id']}"},
-                            {"notified_1h_at": _utc_now_iso()},
-                        )
 
-        except Exception as e:
-            print("Scheduled job error:", e)
-            print("🔥 SCHEDULER TICK", datetime.utcnow())
+def wake_notification_jobs():
+    """
+    Ask the notification jobs to run now instead of at their next tick.
+    Safe from any thread. Only one gunicorn worker runs the jobs, so the
+    others forward the request over that worker's UNIX datagram socket.
+    """
+    loop = _JOBS_LOOP
+    if loop is not None:
+        loop.call_soon_threadsafe(_wake_jobs_in_loop)
+        return
+
+    if not hasattr(socket, "AF_UNIX"):
+        return
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.setblocking(False)
+            sock.sendto(b"wake", str(BACKGROUND_JOBS_WAKE_SOCKET))
+    except OSError:
+        # No jobs worker listening, or wake-ups already queued; either way
+        # the periodic tick still picks the change up
+        pass
+
+
+def _listen_for_wakeups(loop):
+    """
+    Bind BACKGROUND_JOBS_WAKE_SOCKET in the jobs worker and wake the jobs on
+    every datagram from the other workers.
+    """
+    global _JOBS_WAKE_SOCKET
+
+    if not hasattr(socket, "AF_UNIX"):
+        return
 
-        time.sleep(60)
+    path = str(BACKGROUND_JOBS_WAKE_SOCKET)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        # Only the holder of the jobs lock gets here, so any existing
+        # socket file is left over from a previous jobs worker
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        sock.bind(path)
+    except OSError as e:
+        sock.close()
+        print("Job wake socket unavailable:", e)
+        return
+    sock.setblocking(False)
+
+    def on_readable():
+        # Drain everything queued; a burst of writes is one wake-up
+        try:
+            while True:
+                sock.recv(64)
+        except OSError:
+            pass
+        _wake_jobs_in_loop()
+
+    loop.add_reader(sock.fileno(), on_readable)
+    _JOBS_WAKE_SOCKET = sock
+
+
+async def _run_periodic(job, interval, wake):
+    while True:
+        # Jobs do blocking Supabase/FCM I/O; keep it off the event loop
+        await asyncio.to_thread(job)
+
+        try:
+            await asyncio.wait_for(wake.wait(), timeout=interval)
+            await asyncio.sleep(JOB_WAKE_DEBOUNCE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        wake.clear()
+
+
+async def _notification_jobs():
+    """Both notification jobs on one event loop instead of a thread each."""
+    global _JOBS_LOOP
+
+    jobs = (
+        (aurora_notification_job, AURORA_JOB_INTERVAL_SECONDS),
+        (scheduled_event_notification_job, SCHEDULED_JOB_INTERVAL_SECONDS),
+    )
+    _JOB_WAKEUPS[:] = [asyncio.Event() for _ in jobs]
+    _JOBS_LOOP = asyncio.get_running_loop()
+    _listen_for_wakeups(_JOBS_LOOP)
+
+    await asyncio.gather(
+        *(
+            _run_periodic(job, interval, wake)
+            for (job, interval), wake in zip(jobs, _JOB_WAKEUPS)
+        )
+    )
 
 
 # ---------- Load Moon Data Once ----------
 
-with open(DATA_DIR / "moon_phases.json", "r", encoding="utf-8") as f:
-    MOON_RAW = json.load(f)
+MOON_RAW = _json_loads((DATA_DIR / "moon_phases.json").read_bytes())
+
+METEOR_RAW = _json_loads((DATA_DIR / "meteor_showers.json").read_bytes())
+
+COMETS_RAW = _json_loads((DATA_DIR / "comets.json").read_bytes())
+
+ALIGNMENTS_RAW = _json_loads((DATA_DIR / "alignments.json").read_bytes())
 
-with open(DATA_DIR / "meteor_showers.json", "r", encoding="utf-8") as f:
-    METEOR_RAW = json.load(f)
 
-with open(DATA_DIR / "comets.json", "r", encoding="utf-8") as f:
-    COMETS_RAW = json.load(f)
+def _build_moon_index():
+    """MOON_RAW as (date, date_str, info) tuples sorted by date."""
+    index = []
+    for date_str, info in sorted(MOON_RAW.items()):
+        try:
+            d = datetime.fromisoformat(date_str).date()
+        except Exception:
+            continue
+        index.append((d, date_str, info))
+    return index
 
-with open(DATA_DIR / "alignments.json", "r", encoding="utf-8") as f:
-    ALIGNMENTS_RAW = json.load(f)
+
+# MOON_RAW never changes after load, so sort/parse it once and let the
+# moon endpoints bisect into it instead of re-scanning per request.
+MOON_SORTED = _build_moon_index()
+MOON_DATES = [d for d, _, _ in MOON_SORTED]
+
+FULL_MOONS_BY_MONTH = {}  # (year, month) -> [date, ...]
+for _d, _date_str, _info in MOON_SORTED:
+    if _info.get("phase") == "Full Moon":
+        FULL_MOONS_BY_MONTH.setdefault((_d.year, _d.month), []).append(_d)
+
+
+def _moon_slice(start, end):
+    """MOON_SORTED entries with start <= date <= end."""
+    return MOON_SORTED[bisect_left(MOON_DATES, start) : bisect_right(MOON_DATES, end)]
 
 
 def build_moon_events():
     events = []
     last_phase = None
 
-    for date_str, info in sorted(MOON_RAW.items()):
+    for _, date_str, info in MOON_SORTED:
         phase = info["phase"]
 
         # Only emit an event when the phase changes
@@ -592,99 +916,259 @@ def build_moon_events():
 
 MOON_EVENTS = build_moon_events()
 
-with open(DATA_DIR / "eclipses.json", "r", encoding="utf-8") as f:
-    ECLIPSES_RAW = json.load(f)
+ECLIPSES_RAW = _json_loads((DATA_DIR / "eclipses.json").read_bytes())
+
+
+def _index_future(events, key):
+    """
+    Index static events for "key(e) >= now" filtering. Returns
+    (events, times, positions): times are the parsed keys in sorted order and
+    positions[i] is the file position of the event with times[i]. Events whose
+    key does not parse are never filtered out.
+    """
+    dated = []
+    for pos, e in enumerate(events):
+        try:
+            dated.append((_parse_iso(key(e)), pos))
+        except Exception:
+            continue
+    dated.sort(key=itemgetter(0))
+    return events, [t for t, _ in dated], [pos for _, pos in dated]
+
+
+@lru_cache(maxsize=32)
+def _events_from(kind, passed):
+    """Events of `kind` in file order, minus the first `passed` to expire."""
+    events, _, positions = STATIC_INDEXES[kind]
+    gone = set(positions[:passed])
+    return tuple(e for pos, e in enumerate(events) if pos not in gone)
+
+
+def _upcoming_static(kind, now=None):
+    # The result only changes when another event expires, so it is memoized
+    # on how many have expired rather than recomputed per request.
+    _, times, _ = STATIC_INDEXES[kind]
+    passed = bisect_left(times, now or datetime.utcnow())
+    return list(_events_from(kind, passed))
+
+
+def _meteor_event(m):
+    return {
+        "id": m.get("id"),
+        "type": "meteor",
+        "title": m.get("title"),
+        "start": m.get("start"),
+        "end": m.get("end"),
+        "event_window": m.get("event_window"),
+        "peak_date": m.get("peak_date"),
+        "peak_nights": m.get("peak_nights"),
+        "best_observation_date": m.get("best_observation_date"),
+        "best_time_window": m.get("best_time_window"),
+        "is_all_day": m.get("is_all_day", False),
+        "equipment": m.get("equipment", "naked_eye"),
+        "visibility": m.get("visibility", "global"),
+        "visibility_model": m.get("visibility_model"),
+        "confidence": m.get("confidence"),
+        "source": m.get("source"),
+        "visible_in": m.get("visible_in"),
+        "moonlight": m.get("moonlight"),
+        "moonlight_note": m.get("moonlight_note"),
+        "zhr": m.get("zhr"),
+        "parent_body": m.get("parent_body"),
+        "description": m.get("description"),
+        "tags": m.get("tags", []),
+    }
+
+
+METEOR_EVENTS = [_meteor_event(m) for m in METEOR_RAW]
+
+# Static feeds never change after load, so their time keys are parsed once
+STATIC_KINDS = ("eclipse", "meteor", "comet", "alignment")
+STATIC_INDEXES = {
+    "eclipse": _index_future(ECLIPSES_RAW, itemgetter("start")),
+    "meteor": _index_future(METEOR_EVENTS, itemgetter("start")),
+    "comet": _index_future(COMETS_RAW, lambda e: e.get("end", e["start"])),
+    "alignment": _index_future(ALIGNMENTS_RAW, itemgetter("start")),
+}
+
+
+# Browsers/CDNs may reuse static feed bodies for this long, revalidating
+# with If-None-Match afterwards
+STATIC_MAX_AGE_SECONDS = 3600
+# /api/upcoming depends on the weather/aurora caches, so it goes stale sooner
+UPCOMING_MAX_AGE_SECONDS = 300
+
+
+def _json_body(obj):
+    """Serialized JSON body plus its ETag."""
+    body = app.json.dumps_bytes(obj)
+    return body, hashlib.sha1(body).hexdigest()
+
+
+def _cached_json_response(body, etag, max_age=STATIC_MAX_AGE_SECONDS):
+    """
+    JSON response for a precomputed body. Answers 304 with no body when
+    the client's If-None-Match already has this ETag.
+    """
+    resp = app.response_class(body, mimetype=app.json.mimetype)
+    resp.set_etag(etag)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = max_age
+    return resp.make_conditional(request)
+
+
+@lru_cache(maxsize=32)
+def _events_json(kind, passed):
+    return _json_body(list(_events_from(kind, passed)))
+
+
+def _static_json_response(kind):
+    """
+    JSON response for a static feed. The serialized body and its ETag are
+    memoized like the feed itself, so repeat hits skip serialization entirely.
+    """
+    passed = bisect_left(STATIC_INDEXES[kind][1], datetime.utcnow())
+    return _cached_json_response(*_events_json(kind, passed))
 
 
 def get_eclipse_events():
-    return [e for e in ECLIPSES_RAW if _is_future(e)]
+    return _upcoming_static("eclipse")
 
 
 def get_meteor_events():
-    events = []
+    return _upcoming_static("meteor")
+
+
+def get_comet_events():
+    # Comets stay listed until their end date has passed
+    return _upcoming_static("comet")
+
+
+def get_alignment_events():
+    return _upcoming_static("alignment")
+
+
+def _static_key(now):
+    """(expired count per indexed feed, UTC date): what the static feeds depend on."""
+    return (
+        tuple(bisect_left(STATIC_INDEXES[kind][1], now) for kind in STATIC_KINDS),
+        now.date(),
+    )
+
+
+@lru_cache(maxsize=8)
+def _static_feeds(passed, today):
+    eclipse, meteor, comet, alignment = (
+        _events_from(kind, n) for kind, n in zip(STATIC_KINDS, passed)
+    )
+    return eclipse + meteor + comet + _special_moon_events(today, 60) + alignment
+
+
+def get_all_static_events():
+    """Every static feed, in the order /api/upcoming has always listed them."""
+    return list(_static_feeds(*_static_key(datetime.utcnow())))
+
+
+@lru_cache(maxsize=8)
+def _static_event_index(passed, today):
+    """
+    All static events as parallel tuples (starts, start_times, expire_times,
+    events), sorted by the "start" string. The sort is stable, so ties keep
+    feed order. start_times are parsed starts; expire_times are parsed ends
+    plus the one-day grace /api/upcoming keeps ended events for.
+    """
+    events = sorted(_static_feeds(passed, today), key=itemgetter("start"))
+    return (
+        tuple(e["start"] for e in events),
+        tuple(_parse_iso(e["start"]) for e in events),
+        tuple(_event_expires_at(e) for e in events),
+        tuple(events),
+    )
 
-    for m in METEOR_RAW:
-        events.append(
-            {
-                "id": m.get("id"),
-                "type": "meteor",
-                "title": m.get("title"),
-                "start": m.get("start"),
-                "end": m.get("end"),
-                "event_window": m.get("event_window"),
-                "peak_date": m.get("peak_date"),
-                "peak_nights": m.get("peak_nights"),
-                "best_observation_date": m.get("best_observation_date"),
-                "best_time_window": m.get("best_time_window"),
-                "is_all_day": m.get("is_all_day", False),
-                "equipment": m.get("equipment", "naked_eye"),
-                "visibility": m.get("visibility", "global"),
-                "visibility_model": m.get("visibility_model"),
-                "confidence": m.get("confidence"),
-                "source": m.get("source"),
-                "visible_in": m.get("visible_in"),
-                "moonlight": m.get("moonlight"),
-                "moonlight_note": m.get("moonlight_note"),
-                "zhr": m.get("zhr"),
-                "parent_body": m.get("parent_body"),
-                "description": m.get("description"),
-                "tags": m.get("tags", []),
-            }
-        )
 
-    return [e for e in events if _is_future(e)]
+def _event_expires_at(e):
+    return _parse_iso(e.get("end", e["start"])) + timedelta(days=1)
 
 
-def get_comet_events():
-    now = datetime.utcnow()
-    events = []
+def get_static_event_index(now=None):
+    """_static_event_index for the current moment (rebuilt as events expire)."""
+    return _static_event_index(*_static_key(now or datetime.utcnow()))
 
-    for e in COMETS_RAW:
-        try:
-            end = _parse_iso(e.get("end", e["start"]))
-            if end >= now:
-                events.append(e)
-        except Exception:
-            events.append(e)
 
-    return events
+@lru_cache(maxsize=8)
+def _static_events_by_id(passed, today):
+    by_id = {}
+    for e in _static_feeds(passed, today):
+        by_id.setdefault(e["id"], e)  # first feed wins, like the old scan
+    return by_id
 
 
-def get_alignment_events():
-    return [e for e in ALIGNMENTS_RAW if _is_future(e)]
+def get_static_event(event_id):
+    """Upcoming static event with this id, or None."""
+    return _static_events_by_id(*_static_key(datetime.utcnow())).get(event_id)
 
 
 def _utc_now_iso():
     return datetime.utcnow().isoformat() + "Z"
 
 
+def _ics_time(dt):
+    return dt.strftime("%Y%m%dT%H%M%SZ")
+
+
+# RFC 5545 body; lines end in CRLF. DTSTAMP is filled in per download.
+_ICS_TEMPLATE = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "PRODID:-//My Sky//EN\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:{uid}\r\n"
+    "DTSTAMP:{{DTSTAMP}}\r\n"
+    "DTSTART:{dtstart}\r\n"
+    "DTEND:{dtend}\r\n"
+    "SUMMARY:{summary}\r\n"
+    "DESCRIPTION:Saved from My Sky\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def _ics_escape(text):
+    """Escape a TEXT value (RFC 5545 3.3.11)."""
+    return (
+        str(text)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+@lru_cache(maxsize=2048)
+def _build_ics(event_id, title, start_iso, end_iso):
+    """ICS body for an event, with a {DTSTAMP} placeholder left in."""
+    return _ICS_TEMPLATE.format(
+        uid=f"{event_id}@mysky",
+        dtstart=_ics_time(_parse_iso(start_iso)),
+        dtend=_ics_time(_parse_iso(end_iso)),
+        summary=_ics_escape(title),
+    ).encode()
+
+
 def generate_ics(event):
-    def fmt(dt):
-        return dt.strftime("%Y%m%dT%H%M%SZ")
+    ics = _build_ics(
+        event["id"],
+        event.get("title", "Cosmic Event"),
+        event["start"],
+        event.get("end", event["start"]),
+    )
+    return ics.replace(b"{DTSTAMP}", _ics_time(datetime.utcnow()).encode())
 
-    start = _parse_iso(event["start"])
-    end = _parse_iso(event.get("end", event["start"]))
-
-    uid = f'{event["id"]}@mysky'
-
-    return f"""BEGIN:VCALENDAR
-VERSION:2.0
-PRODID:-//My Sky//EN
-BEGIN:VEVENT
-UID:{uid}
-DTSTAMP:{fmt(datetime.utcnow())}
-DTSTART:{fmt(start)}
-DTEND:{fmt(end)}
-SUMMARY:{event.get("title", "Cosmic Event")}
-DESCRIPTION:Saved from My Sky
-END:VEVENT
-END:VCALENDAR
-"""
-
-
-def _is_future(event):
+
+def _is_future(event, now=None):
     try:
-        return _parse_iso(event["start"]) >= datetime.utcnow()
+        return _parse_iso(event["start"]) >= (now or datetime.utcnow())
     except Exception:
         return True
 
@@ -693,66 +1177,196 @@ def _load_aurora_cache():
     if not AURORA_CACHE_FILE.exists():
         return None
     try:
-        return json.loads(AURORA_CACHE_FILE.read_text(encoding="utf-8"))
+        return _json_loads(AURORA_CACHE_FILE.read_bytes())
     except Exception:
         return None
 
 
 def _save_aurora_cache(payload):
-    AURORA_CACHE_FILE.write_text(json.dumps(payload), encoding="utf-8")
+    AURORA_CACHE_FILE.write_bytes(_json_dumps(payload))
+
+
+def _aurora_cache_age_seconds():
+    """Age of the cache file from its mtime, or None if there is no file."""
+    try:
+        return time.time() - AURORA_CACHE_FILE.stat().st_mtime
+    except OSError:
+        return None
+
+
+# Parsed NOAA payload ({"cached_at", "kp_forecast"}) kept in memory and
+# refreshed by aurora_cache_refresher; the disk file is only used to warm
+# a fresh process and as a fallback when NOAA is unreachable.
+_AURORA_MEM = None
+
+# Held while fetching from NOAA, so concurrent cache misses share one request
+_NOAA_FETCH_LOCK = threading.Lock()
+
+# (monotonic failed_at, message) of the last failed NOAA fetch. For
+# NOAA_FAILURE_TTL seconds afterwards callers, including those queued on
+# _NOAA_FETCH_LOCK, go straight to the stale/disk payload instead of each
+# making their own attempt in turn.
+NOAA_FAILURE_TTL = 60
+_NOAA_FAILURE = None
+
+
+def _raise_if_noaa_recently_failed():
+    failed = _NOAA_FAILURE
+    if failed and time.monotonic() - failed[0] < NOAA_FAILURE_TTL:
+        raise requests.RequestException(failed[1])
+
+
+def _aurora_payload_fresh(payload):
+    try:
+        cached_at = _parse_iso(payload["cached_at"])
+        age = (datetime.utcnow() - cached_at).total_seconds()
+        return age < AURORA_CACHE_TTL_SECONDS
+    except Exception:
+        return False
+
+
+def _refresh_noaa_kp_forecast(background=False):
+    """
+    Fetch NOAA into memory and the disk cache. The background refresher
+    passes background=True to get retries and the longer timeout.
+    """
+    global _AURORA_MEM, _NOAA_FAILURE
+
+    if background:
+        session, timeout = NOAA_SESSION, NOAA_TIMEOUT
+    else:
+        session, timeout = NOAA_REQUEST_SESSION, NOAA_REQUEST_TIMEOUT
+
+    try:
+        r = session.get(NOAA_KP_FORECAST_URL, timeout=timeout)
+        r.raise_for_status()
+        try:
+            kp_forecast = _json_loads(r.content)
+        except ValueError as e:
+            # orjson raises a plain ValueError; keep bad bodies on the
+            # RequestException path so the disk fallback still applies
+            raise requests.RequestException(f"Invalid NOAA response: {e}") from e
+    except requests.RequestException as e:
+        _NOAA_FAILURE = (time.monotonic(), f"NOAA request failed: {e}")
+        raise
+    _NOAA_FAILURE = None
+
+    payload = {"cached_at": _utc_now_iso(), "kp_forecast": kp_forecast}
+    _AURORA_MEM = payload
+    _save_aurora_cache(payload)
+    return kp_forecast
 
 
 def fetch_noaa_kp_forecast_cached():
     """
-    Returns NOAA Kp forecast JSON (array of arrays) with a 1-hour cache on disk.
+    Returns NOAA Kp forecast JSON (array of arrays) with a 1-hour cache,
+    served from memory (warm-started from disk).
     Source: NOAA SWPC services endpoint.
     """
-    cached = _load_aurora_cache()
-    if cached:
-        try:
-            cached_at = datetime.fromisoformat(cached["cached_at"].replace("Z", ""))
-            age = (datetime.utcnow() - cached_at).total_seconds()
-            if age < AURORA_CACHE_TTL_SECONDS:
-                return cached["kp_forecast"]
-        except Exception:
-            pass
+    global _AURORA_MEM
 
-    # Fetch fresh
-    try:
-        with urlopen(NOAA_KP_FORECAST_URL, timeout=10) as r:
-            raw = r.read().decode("utf-8")
-            kp_forecast = json.loads(raw)
+    cached = _AURORA_MEM
+    if cached is None:
+        # Only parse the file when its mtime says it can still be fresh
+        age = _aurora_cache_age_seconds()
+        if age is not None and age < AURORA_CACHE_TTL_SECONDS:
+            cached = _load_aurora_cache()
+            if cached and "kp_forecast" in cached:
+                _AURORA_MEM = cached
+
+    if cached and _aurora_payload_fresh(cached):
+        return cached["kp_forecast"]
 
-        _save_aurora_cache({"cached_at": _utc_now_iso(), "kp_forecast": kp_forecast})
-        return kp_forecast
-    except URLError:
+    # Fetch fresh (normally done ahead of time by aurora_cache_refresher)
+    try:
+        _raise_if_noaa_recently_failed()
+        with _NOAA_FETCH_LOCK:
+            # Another request may have refreshed (or failed) while we waited
+            current = _AURORA_MEM
+            if current is not cached and _aurora_payload_fresh(current or {}):
+                return current["kp_forecast"]
+            _raise_if_noaa_recently_failed()
+            return _refresh_noaa_kp_forecast()
+    except requests.RequestException:
         # If NOAA is unreachable, fall back to cache if we have it
+        if cached is None:
+            cached = _load_aurora_cache()
         if cached and "kp_forecast" in cached:
             return cached["kp_forecast"]
         raise
 
 
+# Runs NOAA fetches that a request needs alongside an Open-Meteo call
+FETCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fetch")
+
+
+def _prefetch_noaa_kp_forecast():
+    """
+    Start fetch_noaa_kp_forecast_cached on FETCH_POOL when the in-memory
+    payload is stale, so a cold request waits for NOAA and Open-Meteo
+    concurrently. Returns the future, or None when memory is already fresh.
+    """
+    if _aurora_payload_fresh(_AURORA_MEM or {}):
+        return None
+    return FETCH_POOL.submit(fetch_noaa_kp_forecast_cached)
+
+
+def aurora_cache_refresher():
+    while True:
+        try:
+            with _NOAA_FETCH_LOCK:
+                _refresh_noaa_kp_forecast(background=True)
+        except Exception as e:
+            print("Aurora cache refresh error:", e)
+
+        time.sleep(AURORA_REFRESH_INTERVAL_SECONDS)
+
+
+# |lat| thresholds and the Kp required at or above each one
+_KP_LAT_BREAKS = (50, 54, 57, 60, 63, 67)
+_KP_VALUES = (9, 8, 7, 6, 5, 4, 3)
+
+
 def required_kp_for_lat(lat):
     """
     Very simple, practical mapping:
     higher latitude needs lower Kp; mid-latitudes need higher Kp.
     Uses absolute latitude so it works for southern hemisphere too.
     """
-    a = abs(float(lat))
-
-    if a >= 67:
-        return 3
-    if a >= 63:
-        return 4
-    if a >= 60:
-        return 5
-    if a >= 57:
-        return 6
-    if a >= 54:
-        return 7
-    if a >= 50:
-        return 8
-    return 9
+    return _KP_VALUES[bisect_right(_KP_LAT_BREAKS, abs(float(lat)))]
+
+
+# (kp_rows, series) for the last NOAA payload seen, so repeat calls on the
+# same payload skip re-parsing every row.
+_KP_SERIES = None
+
+
+def _kp_series(kp_rows):
+    """
+    Parse NOAA Kp rows once into time-sorted parallel lists:
+    (times, kps, rows) where rows[i] = (t, kp, t_str, status, scale).
+    Header and malformed rows are dropped.
+    """
+    global _KP_SERIES
+
+    cached = _KP_SERIES
+    if cached is not None and cached[0] is kp_rows:
+        return cached[1]
+
+    rows = []
+    # skip header row
+    for row in kp_rows[1:]:
+        try:
+            t_str, kp_str, status, scale = row
+            t = _parse_iso(t_str)  # "YYYY-MM-DD HH:MM:SS"
+            rows.append((t, float(kp_str), t_str, status, scale))
+        except Exception:
+            continue
+
+    rows.sort(key=itemgetter(0))
+    series = ([r[0] for r in rows], [r[1] for r in rows], rows)
+    _KP_SERIES = (kp_rows, series)
+    return series
 
 
 def summarize_kp_next_24h(kp_rows):
@@ -768,28 +1382,31 @@ def summarize_kp_next_24h(kp_rows):
     now = datetime.utcnow()
     cutoff = now + timedelta(hours=24)
 
-    max_kp = None
-    max_entry = None
+    times, kps, rows = _kp_series(kp_rows)
 
-    # skip header row
-    for row in kp_rows[1:]:
-        t_str, kp_str, status, scale = row
-        try:
-            t = datetime.strptime(t_str, "%Y-%m-%d %H:%M:%S")
-            if now <= t <= cutoff:
-                kp = float(kp_str)
-                if (max_kp is None) or (kp > max_kp):
-                    max_kp = kp
-                    max_entry = {
-                        "time_tag": t_str + "Z",
-                        "kp": kp,
-                        "status": status,
-                        "noaa_scale": scale,
-                    }
-        except Exception:
-            continue
+    # Rows are time-sorted, so the 24h window is a contiguous slice
+    lo = bisect_left(times, now)
+    hi = bisect_right(times, cutoff)
+    if lo >= hi:
+        return None, None
+
+    # max() keeps the first of equal values, like the old strict ">" scan
+    i = max(range(lo, hi), key=kps.__getitem__)
+    t, kp, t_str, status, scale = rows[i]
+
+    return kp, {
+        "time_tag": t_str + "Z",
+        "kp": kp,
+        "status": status,
+        "noaa_scale": scale,
+    }
 
-    return max_kp, max_entry
+
+AURORA_FORECAST_TTL_SECONDS = 15 * 60
+
+# (round(lat, 2), round(lon, 2)) -> (computed_at, forecast); same grid as the
+# weather cache, so nearby users and repeat polls share one computation.
+_AURORA_FORECASTS = {}
 
 
 def get_aurora_forecast(lat, lon):
@@ -797,11 +1414,37 @@ def get_aurora_forecast(lat, lon):
     Aurora forecast with:
     - Geomagnetic strength score
     - Sky visibility score (cloud-based)
+    Cached per location for AURORA_FORECAST_TTL_SECONDS.
     """
+    key = (round(lat, 2), round(lon, 2))
+    hit = _AURORA_FORECASTS.get(key)
+    if hit and time.time() - hit[0] < AURORA_FORECAST_TTL_SECONDS:
+        return dict(hit[1], lat=lat, lon=lon)
+
+    if len(_AURORA_FORECASTS) >= 1024:
+        _AURORA_FORECASTS.clear()
+
+    forecast = _compute_aurora_forecast(lat, lon)
+    _AURORA_FORECASTS[key] = (time.time(), forecast)
+    return dict(forecast)
+
+
+def _compute_aurora_forecast(lat, lon):
+
+    # NOAA and Open-Meteo are independent, so fetch them side by side
+    kp_prefetch = _prefetch_noaa_kp_forecast()
+    weather = get_weather_forecast(lat, lon)
 
-    kp_rows = fetch_noaa_kp_forecast_cached()
+    if kp_prefetch is not None:
+        kp_rows = kp_prefetch.result()
+    else:
+        kp_rows = fetch_noaa_kp_forecast_cached()
     max_kp, max_entry = summarize_kp_next_24h(kp_rows)
 
+    # The fetch above leaves the payload in memory; disk only as a fallback
+    cache = _AURORA_MEM or _load_aurora_cache()
+    cached_at = cache.get("cached_at") if cache else None
+
     req_kp = required_kp_for_lat(lat)
     now = datetime.utcnow()
 
@@ -826,21 +1469,17 @@ def get_aurora_forecast(lat, lon):
             geomagnetic_state = "Strong"
 
     # --- Weather Score ---
-    weather = get_weather_forecast(lat, lon)
-
-    night_hours = [
-        h
-        for h in weather.get("hours", [])
-        if h.get("is_night")
-        and now <= _parse_iso(h["time"]) <= now + timedelta(hours=24)
-    ]
+    # Night hours in the next 24h are a contiguous slice of the sorted series
+    times, clouds, _ = _weather_night_series(weather)
+    lo = bisect_left(times, now)
+    hi = bisect_right(times, now + timedelta(hours=24))
 
     avg_cloud = None
     sky_score = None
     sky_state = "Unknown"
 
-    if night_hours:
-        avg_cloud = sum(h["cloud"] for h in night_hours) / len(night_hours)
+    if lo < hi:
+        avg_cloud = sum(clouds[lo:hi]) / (hi - lo)
         sky_score = max(0, min(100, int(100 - avg_cloud)))
 
         if avg_cloud < 20:
@@ -881,9 +1520,7 @@ def get_aurora_forecast(lat, lon):
         "peak": max_entry,
         "message": overall,
         "source": "NOAA SWPC + Open-Meteo",
-        "cached_at": (
-            _load_aurora_cache().get("cached_at") if _load_aurora_cache() else None
-        ),
+        "cached_at": cached_at,
     }
 
 
@@ -937,8 +1574,38 @@ BASE_EVENT_CHANCE = {
 }
 
 
-def _parse_iso(dt):
-    return datetime.fromisoformat(dt.replace("Z", ""))
+# (weather, series) for the last forecast seen; every event scored in a
+# request shares one forecast object.
+_WEATHER_SERIES = None
+
+
+def _weather_night_series(weather):
+    """
+    Night hours of a forecast as parallel lists (times, clouds, precips),
+    sorted by time, with each hour parsed once per forecast instead of per
+    event.
+    """
+    global _WEATHER_SERIES
+
+    cached = _WEATHER_SERIES
+    if cached is not None and cached[0] is weather:
+        return cached[1]
+
+    night = sorted(
+        (
+            (_parse_iso(h["time"]), h["cloud"], h["precip"])
+            for h in weather.get("hours", [])
+            if h["is_night"]
+        ),
+        key=itemgetter(0),
+    )
+    series = (
+        [t for t, _, _ in night],
+        [c for _, c, _ in night],
+        [p for _, _, p in night],
+    )
+    _WEATHER_SERIES = (weather, series)
+    return series
 
 
 def _weather_score_for_event(event, weather):
@@ -947,107 +1614,113 @@ def _weather_score_for_event(event, weather):
     average cloud + precip.
     """
     start = _parse_iso(event["start"])
-    end = _parse_iso(event["end"])
+    end = _parse_iso(event["end"]) + timedelta(days=1)
 
-    relevant = [
-        h
-        for h in weather.get("hours", [])
-        if h["is_night"] and start <= _parse_iso(h["time"]) <= end + timedelta(days=1)
-    ]
+    times, clouds, precips = _weather_night_series(weather)
+    lo = bisect_left(times, start)
+    hi = bisect_right(times, end)
 
-    if not relevant:
+    if lo >= hi:
         return None
 
-    avg_cloud = sum(h["cloud"] for h in relevant) / len(relevant)
-    avg_precip = sum(h["precip"] for h in relevant) / len(relevant)
+    avg_cloud = sum(clouds[lo:hi]) / (hi - lo)
+    avg_precip = sum(precips[lo:hi]) / (hi - lo)
 
     return avg_cloud, avg_precip
 
 
-def estimate_visibility(event, lat, lon, weather):
-    base = BASE_EVENT_CHANCE.get(event["type"], 50)
-
-    score = base
-    reason_parts = []
+# Cloud/precip ladders as threshold tables: bisect picks the band, and the
+# reason text for every (cloud band, precip band) pair is built once here.
+_CLOUD_BREAKS = (20, 50, 75)  # avg_cloud < 20, < 50, < 75, else
+_CLOUD_ADJUST = (15, 5, -10, -25)
+_CLOUD_REASONS = (
+    "clear skies expected",
+    "partly cloudy skies",
+    "mostly cloudy",
+    "heavy cloud cover",
+)
+_PRECIP_BREAKS = (20, 40)  # avg_precip <= 20, <= 40, else
+_PRECIP_ADJUST = (0, -10, -20)
+_PRECIP_REASONS = (None, "chance of rain", "rain likely")
+_VISIBILITY_REASONS = {
+    (c, p): ", ".join(
+        r for r in (_CLOUD_REASONS[c], _PRECIP_REASONS[p]) if r
+    ).capitalize()
+    for c in range(len(_CLOUD_REASONS))
+    for p in range(len(_PRECIP_REASONS))
+}
 
-    weather_stats = _weather_score_for_event(event, weather)
 
-    if weather_stats:
-        avg_cloud, avg_precip = weather_stats
+def _visibility_score(base, weather_stats):
+    if not weather_stats:
+        return {"chance": max(0, min(100, int(base))), "reason": "visibility uncertain"}
 
-        if avg_cloud < 20:
-            score += 15
-            reason_parts.append("clear skies expected")
-        elif avg_cloud < 50:
-            score += 5
-            reason_parts.append("partly cloudy skies")
-        elif avg_cloud < 75:
-            score -= 10
-            reason_parts.append("mostly cloudy")
-        else:
-            score -= 25
-            reason_parts.append("heavy cloud cover")
+    avg_cloud, avg_precip = weather_stats
+    c = bisect_right(_CLOUD_BREAKS, avg_cloud)
+    p = bisect_left(_PRECIP_BREAKS, avg_precip)
 
-        if avg_precip > 40:
-            score -= 20
-            reason_parts.append("rain likely")
-        elif avg_precip > 20:
-            score -= 10
-            reason_parts.append("chance of rain")
+    score = base + _CLOUD_ADJUST[c] + _PRECIP_ADJUST[p]
+    return {
+        "chance": max(0, min(100, int(score))),
+        "reason": _VISIBILITY_REASONS[(c, p)],
+    }
 
-    score = max(0, min(100, int(score)))
 
-    if not reason_parts:
-        reason = "visibility uncertain"
-    else:
-        reason = ", ".join(reason_parts).capitalize()
+def estimate_visibility(event, lat, lon, weather):
+    base = BASE_EVENT_CHANCE.get(event["type"], 50)
+    return _visibility_score(base, _weather_score_for_event(event, weather))
 
-    return {"chance": score, "reason": reason}
 
+def estimate_visibility_batch(events, lat, lon, weather):
+    """
+    estimate_visibility for a list of events sharing one forecast. The night
+    series is built once up front, and events with the same type and window
+    share one score.
+    """
+    _weather_night_series(weather)
+
+    scores = {}
+    out = []
+    for e in events:
+        key = (e["type"], e["start"], e["end"])
+        if key not in scores:
+            scores[key] = estimate_visibility(e, lat, lon, weather)
+        out.append(dict(scores[key]))
+    return out
+
+
+# Traditional names for full moons
+MOON_NAMES = {
+    1: "Wolf Moon",
+    2: "Snow Moon",
+    3: "Worm Moon",
+    4: "Pink Moon",
+    5: "Flower Moon",
+    6: "Strawberry Moon",
+    7: "Buck Moon",
+    8: "Sturgeon Moon",
+    9: "Harvest Moon",
+    10: "Hunter’s Moon",
+    11: "Beaver Moon",
+    12: "Cold Moon",
+}
 
-def get_moon_window(days=30):
-    today = datetime.utcnow().date()
-    end = today + timedelta(days=days)
+# Only the Strawberry Moon survives the special-moon filter (Blue Moons are
+# dropped, and Supermoon/Micromoon are never produced from MOON_RAW).
+SPECIAL_MOON_MONTHS = {6}
 
-    # Traditional names for full moons
-    month_names = {
-        1: "Wolf Moon",
-        2: "Snow Moon",
-        3: "Worm Moon",
-        4: "Pink Moon",
-        5: "Flower Moon",
-        6: "Strawberry Moon",
-        7: "Buck Moon",
-        8: "Sturgeon Moon",
-        9: "Harvest Moon",
-        10: "Hunter’s Moon",
-        11: "Beaver Moon",
-        12: "Cold Moon",
-    }
 
-    # First, find all full moons in the window grouped by month
-    fulls_by_month = {}
-    for date_str, info in sorted(MOON_RAW.items()):
-        try:
-            d = datetime.fromisoformat(date_str).date()
-        except Exception:
-            continue
+def _window_full_moons(d, today, end):
+    """Full moons in d's month that fall inside [today, end]."""
+    return [m for m in FULL_MOONS_BY_MONTH[(d.year, d.month)] if today <= m <= end]
 
-        if today <= d <= end and info.get("phase") == "Full Moon":
-            key = (d.year, d.month)
-            fulls_by_month.setdefault(key, []).append(date_str)
 
+@lru_cache(maxsize=8)
+def _moon_window(today, days):
+    end = today + timedelta(days=days)
     window = []
 
-    for date_str, info in sorted(MOON_RAW.items()):
-        try:
-            d = datetime.fromisoformat(date_str).date()
-        except Exception:
-            continue
-
-        if not (today <= d <= end):
-            continue
-
+    for d, date_str, info in _moon_slice(today, end):
         entry = {
             "date": date_str,
             "phase": info.get("phase"),
@@ -1056,97 +1729,81 @@ def get_moon_window(days=30):
 
         # Attach special name if this is a named full moon
         if info.get("phase") == "Full Moon":
-            key = (d.year, d.month)
-            moons = fulls_by_month.get(key, [])
+            moons = _window_full_moons(d, today, end)
 
-            if len(moons) > 1 and moons.index(date_str) == 1:
+            if len(moons) > 1 and moons.index(d) == 1:
                 entry["special"] = "Blue Moon"
             else:
-                entry["special"] = month_names.get(d.month)
+                entry["special"] = MOON_NAMES.get(d.month)
 
         window.append(entry)
 
-    return window
+    return tuple(window)
 
 
-def get_special_moon_events(days=60):
-    """
-    Generate special named moon events (Blue Moon, Strawberry Moon, etc.)
-    from MOON_RAW within the next `days`.
-    """
-    today = datetime.utcnow().date()
-    end = today + timedelta(days=days)
+def get_moon_window(days=30):
+    # The window only moves once a day, so memoize on (today, days)
+    return list(_moon_window(datetime.utcnow().date(), days))
 
-    # Collect full moons in the window
-    full_moons = []
-    for date_str, info in sorted(MOON_RAW.items()):
-        try:
-            d = datetime.fromisoformat(date_str).date()
-        except Exception:
-            continue
 
-        if today <= d <= end and info.get("phase") == "Full Moon":
-            full_moons.append((d, date_str, info))
+@lru_cache(maxsize=2)
+def _moon_json(today):
+    return _json_body(list(_moon_window(today, 30)))
 
-    events = []
 
-    # Map month → traditional full moon name
-    month_names = {
-        1: "Wolf Moon",
-        2: "Snow Moon",
-        3: "Worm Moon",
-        4: "Pink Moon",
-        5: "Flower Moon",
-        6: "Strawberry Moon",
-        7: "Buck Moon",
-        8: "Sturgeon Moon",
-        9: "Harvest Moon",
-        10: "Hunter’s Moon",
-        11: "Beaver Moon",
-        12: "Cold Moon",
-    }
+@lru_cache(maxsize=8)
+def _special_moon_events(today, days):
+    end = today + timedelta(days=days)
+    events = []
 
-    # Detect Blue Moons (second full moon in same month)
-    by_month = {}
-    for d, date_str, info in full_moons:
-        key = (d.year, d.month)
-        by_month.setdefault(key, []).append((d, date_str, info))
+    for d, date_str, info in _moon_slice(today, end):
+        if d.month not in SPECIAL_MOON_MONTHS or info.get("phase") != "Full Moon":
+            continue
 
-    for (year, month), moons in by_month.items():
-        for idx, (d, date_str, info) in enumerate(moons):
-            name = month_names.get(month, "Full Moon")
-            tags = ["full_moon"]
+        # A second full moon in the month is a Blue Moon, which is filtered out
+        if _window_full_moons(d, today, end).index(d) == 1:
+            continue
 
-            title = name
-            subtitle = f"{d.strftime('%B')} full moon"
+        events.append(
+            {
+                "id": f"moon-special-{date_str}",
+                "type": "moon_special",
+                "title": MOON_NAMES[d.month],
+                "subtitle": f"{d.strftime('%B')} full moon",
+                "start": f"{date_str}T00:00:00Z",
+                "end": f"{date_str}T23:59:59Z",
+                "visibility": "global",
+                "confidence": "high",
+                "source": "Lunar tradition",
+                "tags": ["full_moon"],
+            }
+        )
 
-            if len(moons) > 1 and idx == 1:
-                title = "Blue Moon"
-                subtitle = "Second full moon of the month"
-                tags.append("blue_moon")
-            # Keep only Strawberry, Supermoon, Micromoon
-            if title not in ("Strawberry Moon", "Supermoon", "Micromoon"):
-                continue
+    return tuple(events)
 
-            events.append(
-                {
-                    "id": f"moon-special-{date_str}",
-                    "type": "moon_special",
-                    "title": title,
-                    "subtitle": subtitle,
-                    "start": f"{date_str}T00:00:00Z",
-                    "end": f"{date_str}T23:59:59Z",
-                    "visibility": "global",
-                    "confidence": "high",
-                    "source": "Lunar tradition",
-                    "tags": tags,
-                }
-            )
 
-    return events
+def get_special_moon_events(days=60):
+    """
+    Generate special named moon events (currently only the Strawberry Moon)
+    from MOON_RAW within the next `days`.
+    """
+    return list(_special_moon_events(datetime.utcnow().date(), days))
 
 
 # ---------- API Routes ----------
+def _latlon():
+    """
+    (lat, lon) query params as floats rounded to 2 decimals (~1 km, the grid
+    the weather and aurora caches use); None where missing or invalid.
+    """
+    args = request.args
+    lat, lon = args.get("lat", type=float), args.get("lon", type=float)
+    return (
+        None if lat is None else round(lat, 2),
+        None if lon is None else round(lon, 2),
+    )
+
+
 @app.route("/api/user/events", methods=["GET"])
 def get_user_events():
     user_id = request.args.get("userId")
@@ -1158,6 +1815,47 @@ def get_user_events():
     return jsonify({"success": True, "events": events})
 
 
+USER_EVENTS_BATCH_MAX = 200  # distinct eventIds accepted per batch request
+USER_EVENTS_IDS_PER_QUERY = 50
+
+
+@app.route("/api/user/events/batch", methods=["POST"])
+def get_user_events_batch():
+    data = request.get_json() or {}
+    user_id = data.get("userId")
+    event_ids = data.get("eventIds")
+
+    if not user_id or not isinstance(event_ids, list):
+        return jsonify({"success": False, "error": "Missing userId or eventIds"}), 400
+
+    event_ids = list(dict.fromkeys(str(i) for i in event_ids if i))
+    if not event_ids:
+        return jsonify({"success": True, "events": {}})
+    if len(event_ids) > USER_EVENTS_BATCH_MAX:
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": f"At most {USER_EVENTS_BATCH_MAX} eventIds per request",
+                }
+            ),
+            400,
+        )
+
+    # A few in.(...) queries instead of a lookup per event card; ids are
+    # sliced so each query string stays well under URL limits
+    events = {}
+    for chunk in _slices(event_ids, USER_EVENTS_IDS_PER_QUERY):
+        rows = sb_get(
+            "user_events",
+            {"user_id": f"eq.{user_id}", "event_id": _in_filter(chunk)},
+        )
+        for r in rows:
+            events[r["event_id"]] = r
+
+    return jsonify({"success": True, "events": events})
+
+
 @app.route("/api/user/location", methods=["GET"])
 def get_user_location():
     user_id = request.args.get("userId")
@@ -1232,6 +1930,8 @@ def set_event_reminders():
         {"user_id": f"eq.{user_id}", "event_id": f"eq.{event_id}"},
         patch_data,
     )
+    if enabled:
+        wake_notification_jobs()
 
     return jsonify({"success": True, "enabled": enabled})
 
@@ -1251,8 +1951,8 @@ def test_push():
     title = f"🌌 {ev.get('title', 'Cosmic Event')}"
     body = "Saved event reminder — tap to view details."
 
-    # 3) include data for deep-link routing later
-    send_push(
+    # 3) include data for deep-link routing later; FCM runs in the background
+    send_push_async(
         user_id,
         title,
         body,
@@ -1263,8 +1963,11 @@ def test_push():
         },
     )
 
-    return jsonify(
-        {"success": True, "sentToUser": user_id, "eventId": ev.get("event_id")}
+    return (
+        jsonify(
+            {"success": True, "sentToUser": user_id, "eventId": ev.get("event_id")}
+        ),
+        202,
     )
 
 
@@ -1293,6 +1996,7 @@ def add_user_event():
     }
 
     sb_post("user_events", row)
+    wake_notification_jobs()
 
     return jsonify({"success": True})
 
@@ -1322,6 +2026,7 @@ def push_subscribe():
 
     try:
         sb_post("push_tokens", {"user_id": user_id, "token": token})
+        wake_notification_jobs()
         return jsonify({"success": True, "message": "Token inserted"}), 200
 
     except requests.HTTPError as e:
@@ -1336,17 +2041,21 @@ def push_subscribe():
 
 @app.route("/api/calendar/<event_id>")
 def export_calendar(event_id):
-    from flask import request
-
     user_id = request.args.get("userId")
 
-    event = None
+    # 1️⃣ Built-in events are served locally, no Supabase round-trip
+    event = get_static_event(event_id)
 
-    # 1️⃣ Try user_events first (saved events)
-    if user_id:
+    # 2️⃣ Otherwise try the user's saved events
+    if not event and user_id:
         rows = sb_get(
             "user_events",
-            {"user_id": f"eq.{user_id}", "event_id": f"eq.{event_id}", "limit": 1},
+            {
+                "user_id": f"eq.{user_id}",
+                "event_id": f"eq.{event_id}",
+                "select": "event_id,title,start",
+                "limit": 1,
+            },
         )
         if rows:
             row = rows[0]
@@ -1357,20 +2066,6 @@ def export_calendar(event_id):
                 "end": row["start"],
             }
 
-    # 2️⃣ If not found → search static events
-    if not event:
-        all_events = []
-        all_events.extend(get_eclipse_events())
-        all_events.extend(get_meteor_events())
-        all_events.extend(get_comet_events())
-        all_events.extend(get_alignment_events())
-        all_events.extend(get_special_moon_events())
-
-        for e in all_events:
-            if e["id"] == event_id:
-                event = e
-                break
-
     if not event:
         return jsonify({"error": "Event not found"}), 404
     # 🚫 Block aurora calendar export
@@ -1408,23 +2103,22 @@ def debug_alignments():
 
 @app.route("/api/moon")
 def moon():
-    return jsonify(get_moon_window(30))
+    return _cached_json_response(*_moon_json(datetime.utcnow().date()))
 
 
 @app.route("/api/eclipses")
 def eclipses():
-    return jsonify(get_eclipse_events())
+    return _static_json_response("eclipse")
 
 
 @app.route("/api/meteors")
 def meteors():
-    return jsonify(get_meteor_events())
+    return _static_json_response("meteor")
 
 
 @app.route("/api/aurora")
 def aurora():
-    lat = request.args.get("lat", type=float)
-    lon = request.args.get("lon", type=float)
+    lat, lon = _latlon()
 
     if lat is None or lon is None:
         return (
@@ -1442,13 +2136,12 @@ def aurora():
 
 @app.route("/api/comets")
 def comets():
-    return jsonify(get_comet_events())
+    return _static_json_response("comet")
 
 
 @app.route("/api/weather")
 def api_weather():
-    lat = request.args.get("lat", type=float)
-    lon = request.args.get("lon", type=float)
+    lat, lon = _latlon()
 
     if lat is None or lon is None:
         return jsonify({"error": "lat and lon are required"}), 400
@@ -1462,62 +2155,168 @@ def api_weather():
 
 @app.route("/api/alignments")
 def alignments():
-    return jsonify(get_alignment_events())
+    return _static_json_response("alignment")
 
 
 @app.route("/api/upcoming")
 def upcoming_events():
-    from flask import request
-
     now = datetime.utcnow()
 
-    all_events = []
-    all_events.extend(get_eclipse_events())
-    all_events.extend(get_meteor_events())
-    all_events.extend(get_comet_events())
-    all_events.extend(get_special_moon_events())
-    all_events.extend(get_alignment_events())
+    # Static events come pre-sorted by start, so the response is the first 50
+    # that survive the filter and nothing past them needs enriching.
+    rows = zip(*get_static_event_index(now))
 
-    lat = request.args.get("lat", type=float)
-    lon = request.args.get("lon", type=float)
+    lat, lon = _latlon()
 
     weather = None
+    forecast = None
     if lat is not None and lon is not None:
-        weather = get_weather_forecast(lat, lon)
+        # Upstream outages only drop the data they feed: no aurora event
+        # without NOAA, no visibility scores without Open-Meteo.
+        try:
+            # The aurora forecast fetches NOAA and this location's weather
+            # concurrently, so the weather lookup after it is a cache hit
+            forecast = get_aurora_forecast(lat, lon)
+        except requests.RequestException as e:
+            print("Upcoming aurora unavailable:", e)
+        try:
+            weather = get_weather_forecast(lat, lon)
+        except requests.RequestException as e:
+            print("Upcoming weather unavailable:", e)
 
-        forecast = get_aurora_forecast(lat, lon)
+    if forecast is not None:
         aurora_event = aurora_forecast_to_upcoming_event(forecast)
         if aurora_event:
-            all_events.append(aurora_event)
+            aurora_row = (
+                aurora_event["start"],
+                _parse_iso(aurora_event["start"]),
+                _event_expires_at(aurora_event),
+                aurora_event,
+            )
+            # merge() puts equal starts from earlier streams first, so the
+            # aurora event lands after static events with the same start
+            rows = heapq.merge(rows, [aurora_row], key=itemgetter(0))
 
-    enriched = []
-    for e in all_events:
-        start = _parse_iso(e["start"])
-        end = _parse_iso(e.get("end", e["start"]))
+    # (start - now).days <= VISIBILITY_WINDOW_DAYS, as a single cutoff
+    score_before = None
+    if weather and lat is not None and lon is not None:
+        score_before = now + timedelta(days=VISIBILITY_WINDOW_DAYS + 1)
 
+    enriched = []
+    to_score = []
+    for _, start, expires, e in rows:
         # Drop only if the event fully ended (end + 1 day)
-        if end + timedelta(days=1) < now:
+        if expires < now:
             continue
 
-        e = dict(e)
-
-        if weather and lat is not None and lon is not None:
-            if (start - now).days <= VISIBILITY_WINDOW_DAYS:
-                e["visibility"] = estimate_visibility(e, lat, lon, weather)
+        if score_before is not None:
+            if start < score_before:
+                # Only events that get a visibility field need their own copy
+                e = dict(e)
+                to_score.append(e)
+            else:
+                # Rows are in start order: nothing after this is in the window
+                score_before = None
 
         enriched.append(e)
+        if len(enriched) == 50:
+            break
+
+    if to_score:
+        scores = estimate_visibility_batch(to_score, lat, lon, weather)
+        for e, visibility in zip(to_score, scores):
+            e["visibility"] = visibility
+
+    # Identical bodies share an ETag, so repeat polls revalidate with a 304
+    return _cached_json_response(*_json_body(enriched), UPCOMING_MAX_AGE_SECONDS)
+
+
+# Every gunicorn worker imports this module. The notification jobs must run in
+# exactly one of them, otherwise each push goes out once per worker.
+BACKGROUND_JOBS_LOCK_FILE = Path(tempfile.gettempdir()) / "observe-pro-jobs.lock"
+# Bound by the jobs worker; other workers send wake-ups to it
+BACKGROUND_JOBS_WAKE_SOCKET = BACKGROUND_JOBS_LOCK_FILE.with_suffix(".sock")
+_jobs_lock_handle = None
+
+
+def _acquire_jobs_lock():
+    """Take the host-wide jobs lock; held until this process exits."""
+    global _jobs_lock_handle
+
+    if fcntl is None:
+        return True
+
+    handle = open(BACKGROUND_JOBS_LOCK_FILE, "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+
+    _jobs_lock_handle = handle
+    return True
+
+
+# `python app.py` with FLASK_DEBUG=1 runs the dev server with the reloader
+DEV_RELOADER = __name__ == "__main__" and os.environ.get("FLASK_DEBUG") == "1"
+
 
-    enriched.sort(key=lambda e: e["start"])
-    return jsonify(enriched[:50])
+def _uses_reloader():
+    """
+    Whether this process was started by a dev server that reloads:
+    `python app.py` with FLASK_DEBUG=1, or `flask run` in debug mode without
+    --no-reload (Flask sets FLASK_RUN_FROM_CLI before loading the app).
+    gunicorn sets neither.
+    """
+    if DEV_RELOADER:
+        return True
+    if os.environ.get("FLASK_RUN_FROM_CLI") != "true":
+        return False
+    if "--no-reload" in sys.argv:
+        return False
+    return "--reload" in sys.argv or get_debug_flag()
+
+
+def _is_reloader_parent():
+    """
+    True in the file-watching parent of the dev reloader. Both `python app.py`
+    and `flask run` load the app there too, but the parent only restarts the
+    child that actually serves requests, so it must not run jobs (or hold
+    the jobs lock) on code that never reloads.
+    """
+    return _uses_reloader() and not is_running_from_reloader()
 
 
 def start_background_jobs():
-    threading.Thread(target=aurora_notification_job, daemon=True).start()
+    if _is_reloader_parent():
+        print("ℹ️ Reloader parent: background jobs start in the serving child")
+        return
+
+    # Per-process: keeps this worker's in-memory NOAA payload warm
+    threading.Thread(target=aurora_cache_refresher, daemon=True).start()
+
+    if os.environ.get("RUN_BG_JOBS", "1") != "1":
+        print("ℹ️ Background notification jobs disabled (RUN_BG_JOBS)")
+        return
+
+    if not _acquire_jobs_lock():
+        print("ℹ️ Background notification jobs already running in another worker")
+        return
 
-    threading.Thread(target=scheduled_event_notification_job, daemon=True).start()
+    threading.Thread(
+        target=lambda: asyncio.run(_notification_jobs()),
+        name="notification-jobs",
+        daemon=True,
+    ).start()
 
 
 start_background_jobs()
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
+    # Local development only; production runs under gunicorn (gunicorn.conf.py)
+    app.run(
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 5000)),
+        debug=DEV_RELOADER,
+        use_reloader=DEV_RELOADER,
+    )
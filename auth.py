@@ -9,6 +9,7 @@ import requests
 from urllib.parse import urlencode
 import json
 from flask import Blueprint, request, jsonify, redirect, Response
+from supabase_rest import sb_get, sb_post, sb_patch, sb_delete
 
 auth_bp = Blueprint("auth", __name__)
 CORS(auth_bp)
@@ -101,57 +102,6 @@ def send_verification_email(to_email, token):
         print("Email send failed:", e)
 
 
-# ============================================================
-# Supabase REST Setup
-# ============================================================
-
-SUPABASE_URL = (os.environ.get("SUPABASE_URL") or "").strip().rstrip("/")
-SUPABASE_KEY = (os.environ.get("SUPABASE_KEY") or "").strip()
-
-HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation",
-}
-
-
-def sb_get(table, params=None):
-    r = requests.get(
-        f"{SUPABASE_URL}/rest/v1/{table}", headers=HEADERS, params=params, timeout=10
-    )
-    r.raise_for_status()
-    return r.json()
-
-
-def sb_post(table, data):
-    r = requests.post(
-        f"{SUPABASE_URL}/rest/v1/{table}", headers=HEADERS, json=data, timeout=10
-    )
-    r.raise_for_status()
-    return r.json()
-
-
-def sb_patch(table, filters, data):
-    r = requests.patch(
-        f"{SUPABASE_URL}/rest/v1/{table}",
-        headers=HEADERS,
-        params=filters,
-        json=data,
-        timeout=10,
-    )
-    r.raise_for_status()
-    return r.json()
-
-
-def sb_delete(table, filters):
-    r = requests.delete(
-        f"{SUPABASE_URL}/rest/v1/{table}", headers=HEADERS, params=filters, timeout=10
-    )
-    r.raise_for_status()
-    return r.json()
-
-
 # ============================================================
 # Google OAuth
 # ============================================================
@@ -0,0 +1,32 @@
+# gunicorn.conf.py
+# Production server settings, picked up automatically by `gunicorn app:app`.
+# `python app.py` still starts the Flask dev server for local work.
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Threaded workers: request handlers spend most of their time waiting on
+# Supabase / Open-Meteo / NOAA, so threads keep one slow call from
+# blocking everything else in the worker.
+#
+# Workers default to the CPUs this process may actually use (cpu_count()
+# reports the whole host inside containers), capped at 4: with
+# preload_app=False every worker builds its own static indexes, thread
+# pools and Supabase connection pools, so more workers mostly cost memory,
+# and affinity does not see cgroup CPU quotas. Where affinity is not
+# available (macOS) default to 2. Set WEB_CONCURRENCY to override.
+if hasattr(os, "sched_getaffinity"):
+    _default_workers = min(len(os.sched_getaffinity(0)), 4)
+else:
+    _default_workers = 2
+workers = int(os.environ.get("WEB_CONCURRENCY", _default_workers))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+
+timeout = 30
+
+# No preload: each worker imports app.py itself, so its background threads
+# (NOAA refresher, and the notification jobs in whichever worker takes the
+# jobs lock) are started in the process that runs them, not in the master.
+preload_app = False
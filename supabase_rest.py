@@ -0,0 +1,74 @@
+import os
+import json
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# ============================================================
+# Supabase REST Setup (shared by app.py and auth.py)
+# ============================================================
+
+SUPABASE_URL = (os.environ.get("SUPABASE_URL") or "").strip().rstrip("/")
+SUPABASE_KEY = (os.environ.get("SUPABASE_KEY") or "").strip()
+
+HEADERS = {
+    "apikey": SUPABASE_KEY,
+    "Authorization": f"Bearer {SUPABASE_KEY}",
+    "Content-Type": "application/json",
+    "Prefer": "return=representation",
+}
+
+
+# One pooled session for all Supabase calls in the process: keep-alive
+# reuses the TLS connection instead of handshaking on every sb_* call.
+SB_SESSION = requests.Session()
+SB_SESSION.headers.update(HEADERS)
+SB_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=50,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 502, 503, 504],
+            raise_on_status=False,
+        ),
+    ),
+)
+
+
+def _loads(data):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def sb_get(table, params=None):
+    r = SB_SESSION.get(f"{SUPABASE_URL}/rest/v1/{table}", params=params, timeout=10)
+    r.raise_for_status()
+    return _loads(r.content)
+
+
+def sb_post(table, data):
+    r = SB_SESSION.post(f"{SUPABASE_URL}/rest/v1/{table}", json=data, timeout=10)
+    r.raise_for_status()
+    return _loads(r.content)
+
+
+def sb_patch(table, filters, data):
+    r = SB_SESSION.patch(
+        f"{SUPABASE_URL}/rest/v1/{table}", params=filters, json=data, timeout=10
+    )
+    r.raise_for_status()
+    return _loads(r.content)
+
+
+def sb_delete(table, filters):
+    r = SB_SESSION.delete(f"{SUPABASE_URL}/rest/v1/{table}", params=filters, timeout=10)
+    r.raise_for_status()
+    return _loads(r.content)
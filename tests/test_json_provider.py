@@ -0,0 +1,55 @@
+import os
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from flask.json.provider import DefaultJSONProvider
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "test")
+os.environ.setdefault("RUN_BG_JOBS", "0")
+
+# Importing app starts the NOAA refresher thread; keep tests offline
+with mock.patch("threading.Thread.start"):
+    import app as app_module
+
+
+@unittest.skipIf(app_module.orjson is None, "orjson not installed")
+class OrjsonJSONProviderTest(unittest.TestCase):
+    def setUp(self):
+        self.app = app_module.app
+        self.stdlib = DefaultJSONProvider(self.app)
+
+    def stdlib_body(self, obj):
+        with self.app.app_context():
+            return self.stdlib.response(obj).get_data()
+
+    def test_non_ascii_is_raw_utf8(self):
+        obj = {"title": "Comet 29P/Schwassmann–Wachmann"}
+        body = self.app.json.dumps_bytes(obj)
+
+        self.assertEqual(body, '{"title":"Comet 29P/Schwassmann–Wachmann"}\n'.encode())
+        # stdlib escaped it; same JSON either way
+        self.assertIn(b"\\u2013", self.stdlib_body(obj))
+        self.assertEqual(
+            self.app.json.loads(body), self.stdlib.loads(self.stdlib_body(obj))
+        )
+
+    def test_datetime_is_iso_8601(self):
+        obj = {"start": datetime(2026, 8, 12, 22, 30)}
+
+        self.assertEqual(
+            self.app.json.dumps_bytes(obj), b'{"start":"2026-08-12T22:30:00"}\n'
+        )
+        self.assertEqual(
+            self.stdlib_body(obj), b'{"start":"Wed, 12 Aug 2026 22:30:00 GMT"}\n'
+        )
+
+    def test_keys_sorted_like_jsonify(self):
+        obj = {"b": 1, "a": [1, 2]}
+
+        self.assertEqual(self.app.json.dumps_bytes(obj), self.stdlib_body(obj))
+
+
+if __name__ == "__main__":
+    unittest.main()
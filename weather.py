@@ -3,12 +3,48 @@
 import os
 import json
 import time
+import threading
 from datetime import datetime, timedelta
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 CACHE_TTL = 3600  # 1 hour
 
+# cache path -> forecast, so warm lookups skip reading/parsing the file
+_MEM_CACHE = {}
+_MEM_CACHE_MAX = 1024
+
+# Striped per-location fetch locks: concurrent misses for the same cache
+# path wait for one Open-Meteo call instead of each making their own
+_FETCH_LOCKS = [threading.Lock() for _ in range(64)]
+
+# cache path -> (failed_at, message). A location whose fetch just failed is
+# not retried for FAILURE_TTL seconds, so an outage fails fast instead of
+# every request waiting out retries and timeouts.
+FAILURE_TTL = 60
+_FAILURES = {}
+
+# Kept-alive session for Open-Meteo, sized for request threads plus the
+# notification job pool fetching at the same time
+OPEN_METEO_SESSION = requests.Session()
+OPEN_METEO_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.2,
+        status_forcelist=[502, 503, 504],
+        raise_on_status=False,
+    ),
+))
+
 
 # -----------------------------
 # Region Detection
@@ -39,24 +75,66 @@ def _cache_path(lat, lon):
     return os.path.join(DATA_DIR, f"weather_cache_{key}.json")
 
 
+def _fresh(data):
+    return time.time() - data.get("generated_ts", 0) < CACHE_TTL
+
+
+def _remember(path, data):
+    _MEM_CACHE.pop(path, None)
+    if len(_MEM_CACHE) >= _MEM_CACHE_MAX:
+        for p, d in list(_MEM_CACHE.items()):
+            if not _fresh(d):
+                _MEM_CACHE.pop(p, None)
+    # All fresh (many distinct locations): drop oldest-inserted first
+    while len(_MEM_CACHE) >= _MEM_CACHE_MAX:
+        try:
+            _MEM_CACHE.pop(next(iter(_MEM_CACHE)), None)
+        except (StopIteration, RuntimeError):
+            break
+    _MEM_CACHE[path] = data
+
+
 def _load_cache(path):
+    cached = _MEM_CACHE.get(path)
+    if cached is not None and _fresh(cached):
+        return cached
+
     if not os.path.exists(path):
         return None
     try:
-        with open(path, "r") as f:
-            data = json.load(f)
-        if time.time() - data.get("generated_ts", 0) < CACHE_TTL:
+        with open(path, "rb") as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson else json.loads(raw)
+        if _fresh(data):
+            _remember(path, data)
             return data
     except Exception:
         return None
     return None
 
 
+def _raise_if_recently_failed(path):
+    failed = _FAILURES.get(path)
+    if failed and time.time() - failed[0] < FAILURE_TTL:
+        raise requests.RequestException(failed[1])
+
+
+def _remember_failure(path, err):
+    if len(_FAILURES) >= _MEM_CACHE_MAX:
+        _FAILURES.clear()
+    _FAILURES[path] = (time.time(), f"Open-Meteo request failed: {err}")
+
+
 def _save_cache(path, data):
     data["generated_ts"] = time.time()
+    _remember(path, data)
     os.makedirs(DATA_DIR, exist_ok=True)
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+    if orjson:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
 
 
 # -----------------------------
@@ -88,16 +166,30 @@ def get_weather_forecast(lat, lon):
     if cached:
         return cached
 
-    region = detect_region(lat, lon)
+    _raise_if_recently_failed(cache_path)
 
-    # For now, all regions use Open-Meteo.
-    # The router is already here; we’ll swap per-region providers later.
-    data = _fetch_open_meteo(lat, lon)
+    with _FETCH_LOCKS[hash(cache_path) % len(_FETCH_LOCKS)]:
+        # Another thread may have fetched (or failed) while we waited
+        cached = _load_cache(cache_path)
+        if cached:
+            return cached
+        _raise_if_recently_failed(cache_path)
 
-    data["region"] = region
+        region = detect_region(lat, lon)
 
-    _save_cache(cache_path, data)
-    return data
+        # For now, all regions use Open-Meteo.
+        # The router is already here; we’ll swap per-region providers later.
+        try:
+            data = _fetch_open_meteo(lat, lon)
+        except requests.RequestException as e:
+            _remember_failure(cache_path, e)
+            raise
+        _FAILURES.pop(cache_path, None)
+
+        data["region"] = region
+
+        _save_cache(cache_path, data)
+        return data
 
 
 # -----------------------------
@@ -114,9 +206,14 @@ def _fetch_open_meteo(lat, lon):
         "timezone": "UTC"
     }
 
-    resp = requests.get(url, params=params, timeout=15)
+    resp = OPEN_METEO_SESSION.get(url, params=params, timeout=15)
     resp.raise_for_status()
-    raw = resp.json()
+    try:
+        raw = orjson.loads(resp.content) if orjson else resp.json()
+    except ValueError as e:
+        # orjson's decode error is a plain ValueError; report bad bodies as a
+        # request failure like resp.json() does, so callers' handling applies
+        raise requests.RequestException(f"Invalid Open-Meteo response: {e}") from e
 
     hourly_times = raw["hourly"]["time"]
     clouds = raw["hourly"]["cloudcover"]